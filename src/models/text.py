@@ -1,6 +1,118 @@
-from typing import List
+from collections.abc import Sequence
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Union, overload
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import re2 as _re_engine  # type: ignore[import-not-found]  # linear time, only used to strip comment lines
+except ImportError:
+    import re as _re_engine
+
+
+# Matches whole comment lines
+_COMMENT_RE = _re_engine.compile(rb'(?m)^#.*$')
+# Punctuation that separates words just like whitespace does
+_PUNCTUATION = bytes.maketrans(b',.-=', b'    ')
+
+_CHUNK_SIZE = 1 << 20
+_BUFFER_SIZE = 1 << 23
+
+# Shared by all texts, so downloads from the same host reuse open connections
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+_SESSION.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+
+class Words(Sequence):
+    """Words of a text kept as one array of ids into a vocabulary of distinct words,
+    instead of a separate string object for every word
+
+    Args:
+        vocabulary (np.ndarray): Distinct words in order of first occurrence
+        ids (np.ndarray): Index into the vocabulary of every word in the text
+    """
+
+    def __init__(self, vocabulary: np.ndarray, ids: np.ndarray) -> None:
+        self.vocabulary = vocabulary
+        self.ids = ids
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[bytes]) -> 'Words':
+        """Builds words from raw tokens, decoding every distinct token only once
+
+        Args:
+            tokens (Iterable[bytes]): Raw tokens
+
+        Returns:
+            Words: Words of the tokens
+        """
+        tokens = list(tokens)
+        token_ids: Dict[bytes, int] = {}
+        ids = np.fromiter((token_ids.setdefault(token, len(token_ids)) for token in tokens), dtype=np.int32, count=len(tokens))
+
+        # Invalid utf-8 is dropped, so different tokens may still decode to the same word, or to no word at all
+        word_ids: Dict[str, int] = {}
+        decoded = (token.decode('utf-8', 'ignore') for token in token_ids)
+        remap = np.fromiter((word_ids.setdefault(word, len(word_ids)) if word else -1 for word in decoded), dtype=np.int32, count=len(token_ids))
+        ids = remap[ids]
+
+        if len(word_ids) < len(token_ids):
+            ids = ids[ids >= 0]
+
+        return cls(np.array(list(word_ids), dtype=object), ids)
+
+    @classmethod
+    def from_words(cls, words: Iterable[str]) -> 'Words':
+        """Builds words from already decoded words
+
+        Args:
+            words (Iterable[str]): Words
+
+        Returns:
+            Words: Words of the sequence
+        """
+        words = list(words)
+        word_ids: Dict[str, int] = {}
+        ids = np.fromiter((word_ids.setdefault(word, len(word_ids)) for word in words), dtype=np.int32, count=len(words))
+
+        return cls(np.array(list(word_ids), dtype=object), ids)
+
+    def __repr__(self) -> str:
+        return f'Words({len(self)} words, {len(self.vocabulary)} distinct)'
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return self.vocabulary[self.ids[index]].tolist()
+
+        return self.vocabulary[self.ids[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.vocabulary[self.ids].tolist())
+
+    def __eq__(self, other: object) -> bool:
+        # Compares equal to any sequence of the same words, just like the list it replaces
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __add__(self, other: Iterable[str]) -> List[str]:
+        return list(self) + list(other)
+
+    def __radd__(self, other: Iterable[str]) -> List[str]:
+        return list(other) + list(self)
 
 
 class Text():
@@ -10,11 +122,11 @@ class Text():
                  text_author: str = 'Unknown',
                  text_file_path: str = None,
                  text_file_url: str = None) -> None:
+        self._words: Optional[Words] = None
         self.text_name = text_name
         self.text_author = text_author
         self.text_file_path = text_file_path
         self.text_file_url = text_file_url
-        self.words = self.get_words()
 
 
     def __repr__(self) -> str:
@@ -52,6 +164,7 @@ class Text():
         if text_file_path is not None and not isinstance(text_file_path, str):
             raise TypeError('text_file_path must be a string')
         self._text_file_path = text_file_path
+        self._words = None
 
     @property
     def text_file_url(self) -> str:
@@ -62,30 +175,82 @@ class Text():
         if text_file_url is not None and not isinstance(text_file_url, str):
             raise TypeError('text_file_url must be a string')
         self._text_file_url = text_file_url
+        self._words = None
 
-    def __get_text(self) -> str:
-        """Gets text from a given file path or url
+    @property
+    def words(self) -> Words:
+        """Words of the text, read and tokenized on first access only
 
         Returns:
-            str: Text
+            Words: Sequence of words
+        """
+        if self._words is None:
+            self._words = Words.from_tokens(self.__tokenize(self.__get_text()))
+
+        return self._words
+
+    @words.setter
+    def words(self, words: Sequence) -> None:
+        # Assigned words are encoded once here, so later changes to the given sequence are not picked up
+        self._words = words if isinstance(words, Words) else Words.from_words(words)
+
+    def __iter_chunks(self) -> Iterator[bytes]:
+        """Yields raw text chunks from a given file path or url as they arrive
+
+        Yields:
+            bytes: Chunk of text
         """
         if self.text_file_path:
             try:
-                with open(self.text_file_path, 'r') as f:
-                    text = f.read()
+                with open(self.text_file_path, 'rb', buffering=_BUFFER_SIZE) as f:
+                    yield from iter(partial(f.read, _CHUNK_SIZE), b'')
             except Exception as e:
                 raise Exception(f'Error while getting data from {self.text_file_path}: {e}')
         elif self.text_file_url:
             try:
-                r = requests.get(self.text_file_url)
+                with _SESSION.get(self.text_file_url, stream=True, timeout=30) as r:
+                    r.raise_for_status()
+                    yield from r.iter_content(_CHUNK_SIZE)
             except Exception as e:
                 raise Exception(f'Error while getting data from {self.text_file_url}: {e}')
-            
-            text = r.text
         else:
             raise Exception('No text file path or url provided')
-        
-        return text
+
+    def __get_text(self) -> bytes:
+        """Gets raw, undecoded text from a given file path or url
+
+        Returns:
+            bytes: Text
+        """
+        return b''.join(self.__iter_chunks())
+
+    @staticmethod
+    def __tokenize(text: bytes) -> List[bytes]:
+        """Helper function that splits raw text into undecoded words
+
+        Args:
+            text (bytes): Raw text, starting at the beginning of a line
+
+        Returns:
+            List[bytes]: List of words
+        """
+        # Looking for a line starting with '#' is much cheaper than a regex pass over the text
+        if text.startswith(b'#') or b'\n#' in text:
+            text = _COMMENT_RE.sub(b'', text)
+
+        return text.translate(_PUNCTUATION).split()
+
+    @staticmethod
+    def __decode(tokens: Iterable[bytes]) -> Iterator[str]:
+        """Helper function that decodes raw words, dropping those made of invalid utf-8 only
+
+        Args:
+            tokens (Iterable[bytes]): Raw words
+
+        Returns:
+            Iterator[str]: Words
+        """
+        return (word for word in (token.decode('utf-8', 'ignore') for token in tokens) if word)
 
     def get_words(self) -> List[str]:
         """Gets words from a given file path or url
@@ -93,16 +258,26 @@ class Text():
         Returns:
             List: List of words
         """
-        text = self.__get_text()
-        text = text.replace('-', ',').replace('=', ',').replace('.', ',')
-        lines = text.split('\n')
-
-        words = []
-
-        for line in lines:
-            if not line.startswith('#'): # ignore comments
-                for word in line.replace(',',' ').split(' '):
-                    if len(word):
-                        words.append(word.strip())
-        return words
-    
\ No newline at end of file
+        return list(self.words)
+
+    def iter_words(self) -> Iterator[str]:
+        """Yields words from a given file path or url while the text is still being read
+
+        Yields:
+            str: Word
+        """
+        pending: List[bytes] = []
+
+        for chunk in self.__iter_chunks():
+            # Words and comments never span lines, so only complete lines are tokenized
+            end = chunk.rfind(b'\n') + 1
+
+            if not end:
+                pending.append(chunk)
+                continue
+
+            pending.append(chunk[:end])
+            yield from self.__decode(self.__tokenize(b''.join(pending)))
+            pending = [chunk[end:]]
+
+        yield from self.__decode(self.__tokenize(b''.join(pending)))
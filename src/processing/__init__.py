@@ -0,0 +1,3 @@
+from .zipf import ZipfAnalyzer, ZipfPrinter, ZipfWriter
+
+__all__ = ['ZipfAnalyzer', 'ZipfPrinter', 'ZipfWriter']
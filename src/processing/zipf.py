@@ -1,8 +1,117 @@
-from collections import Counter
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
-from models.text import Text
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from models.text import Text, Words
+
+# Largest n-gram table (in cells) counted directly instead of by sorting, two int64 arrays of ~32 MB each
+_DENSE_TABLE_SIZE = 1 << 22
+# A table only pays off when it has few cells per window, sorting the windows is cheaper otherwise
+_DENSE_CELLS_PER_WINDOW = 2
+# Largest number of possible n-grams whose table index still fits in an int64
+_PACKED_GRAMS_LIMIT = 1 << 63
+_HASH_MULTIPLIER = np.uint64(1315423911)
+
+
+def _pack_n_grams(grams: np.ndarray, size: int) -> np.ndarray:
+    """Packs every n-gram into one integer, its index in a table of all possible n-grams
+
+    Args:
+        grams (np.ndarray): n-grams as rows of word ids
+        size (int): Size of the vocabulary
+
+    Returns:
+        np.ndarray: Packed n-grams
+    """
+    cells = np.zeros(len(grams), dtype=np.int64)
+
+    for i in range(grams.shape[1]):
+        cells = cells * size + grams[:, i]
+
+    return cells
+
+
+def _hash_n_grams(grams: np.ndarray) -> np.ndarray:
+    """Hashes every n-gram into one integer, for n-grams too long to be packed
+
+    Args:
+        grams (np.ndarray): n-grams as rows of word ids
+
+    Returns:
+        np.ndarray: Hashed n-grams
+    """
+    cells = np.zeros(len(grams), dtype=np.uint64)
+
+    for i in range(grams.shape[1]):
+        cells = cells * _HASH_MULTIPLIER ^ grams[:, i].astype(np.uint64)
+
+    return cells
+
+
+def _unique_n_grams(grams: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Finds distinct n-grams by sorting one integer per n-gram, which is much cheaper than sorting rows
+
+    Args:
+        grams (np.ndarray): n-grams as rows of word ids
+        size (int): Size of the vocabulary
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Distinct n-grams,
+        indices of their first occurrence, index of the distinct n-gram for every n-gram and counts
+    """
+    packed = size ** grams.shape[1] <= _PACKED_GRAMS_LIMIT
+    cells = _pack_n_grams(grams, size) if packed else _hash_n_grams(grams)
+
+    _, first_index, inverse, counts = np.unique(cells, return_index=True, return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    unique_grams = grams[first_index]
+
+    # Packed n-grams are exact, hashes of different n-grams are practically never equal but would silently merge them
+    if not packed and not np.array_equal(grams, unique_grams[inverse]):
+        unique_grams, first_index, inverse, counts = np.unique(grams, axis=0, return_index=True, return_inverse=True, return_counts=True)
+        inverse = inverse.reshape(-1)
+
+    return unique_grams, first_index, inverse, counts
+
+
+def _uses_dense_table(size: int, number: int, length: int) -> bool:
+    """Checks whether n-grams are counted in a dense table instead of by sorting their windows
+
+    Args:
+        size (int): Size of the vocabulary
+        number (int): n-gram
+        length (int): Number of words in the text
+
+    Returns:
+        bool: True if n-grams are counted in a dense table
+    """
+    positions = length - number + 1
+
+    return size ** number <= min(_DENSE_TABLE_SIZE, _DENSE_CELLS_PER_WINDOW * positions)
+
+
+def _count_n_gram_windows(word_ids: np.ndarray, size: int, number: int, offset: int = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Counts distinct n-grams in a run of word ids, kept at module level so worker processes can run it
+
+    Args:
+        word_ids (np.ndarray): Words as indices into the vocabulary
+        size (int): Size of the vocabulary
+        number (int): n-gram
+        offset (int, optional): position of the first word in the whole text. Defaults to 0.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Distinct n-grams as rows of word ids,
+        positions of their first occurrence and their counts
+    """
+    grams, first_index, _, counts = _unique_n_grams(sliding_window_view(word_ids, number), size)
+
+    return grams, first_index + offset, counts
 
 
 class ZipfAnalyzer:
@@ -23,51 +132,141 @@ class ZipfAnalyzer:
 
     def __init__(self, text: Text) -> None:
         self.text = text
+        # Counted n-grams are kept as compact arrays of word ids, not as dicts of joined words
+        self.__n_grams: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self.__n_grams_words: Optional[Words] = None
+
+    @property
+    def __encoded_words(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Vocabulary of the text and its words as indices into it
 
-    def calc_zipf_law_properties(self) -> Tuple[range, List[int]]:
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Tuple of distinct words and word ids
+        """
+        words = self.text.words
+
+        return words.vocabulary, words.ids
+
+    def calc_zipf_law_properties(self, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
         """Calculates Zipf's Law properties for a given list of words
 
         Args:
-            words (List): List of words
+            limit (int, optional): number of most common words to rank. Defaults to None, all words.
 
         Returns:
-            Tuple[list, list]: Tuple of word ranks and word frequencies
+            Tuple[np.ndarray, np.ndarray]: Tuple of word ranks and word frequencies
         """
-        words_count = Counter(self.text.words)
-        sorted_words_count = sorted(words_count.items(), 
-                                    key=lambda x: x[1], 
-                                    reverse=True)
 
-        word_ranks = range(1, len(sorted_words_count) + 1)
-        word_frequencies = [count for _, count in sorted_words_count]
+        if limit is not None and limit < 1:
+            raise Exception('Limit cannot be lower than 1')
+
+        vocabulary, word_ids = self.__encoded_words
+        words_count = np.bincount(word_ids, minlength=len(vocabulary))
+
+        if limit is not None and limit < len(words_count):
+            # Only the most common words get sorted, the long tail is left out
+            words_count = np.partition(words_count, len(words_count) - limit)[-limit:]
+
+        word_frequencies = np.sort(words_count)[::-1]
+        word_ranks = np.arange(1, len(word_frequencies) + 1)
 
         return word_ranks, word_frequencies
     
-    def __generate_n_grams(self, number: int) -> List[str]:
-        """Helper function that generates n-grams for a given number
+    def __count_n_grams(self, number: int, executor: Optional[Executor] = None, n_workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Helper function that counts n-grams for a given number
 
         Args:
             number (int): n-gram
+            executor (Executor, optional): pool to count shards of the text in. Defaults to None.
+            n_workers (int, optional): number of shards for the executor. Defaults to 1.
 
         Returns:
-            List[str]: List of n-grams
+            Tuple[np.ndarray, np.ndarray]: Distinct n-grams as rows of word ids and their counts,
+            most common first and in order of first occurrence otherwise
         """
+        vocabulary, word_ids = self.__encoded_words
+
+        if len(word_ids) < number:
+            return np.empty((0, number), dtype=word_ids.dtype), np.empty(0, dtype=np.intp)
+
+        if _uses_dense_table(len(vocabulary), number, len(word_ids)):
+            return self.__count_dense_n_grams(word_ids, len(vocabulary), number)
+
+        if executor is None:
+            grams, first_index, counts = _count_n_gram_windows(word_ids, len(vocabulary), number)
+        else:
+            grams, first_index, counts = self.__count_sharded_n_grams(word_ids, len(vocabulary), number, executor, n_workers)
+
+        order = np.lexsort((first_index, -counts))
+
+        return grams[order], counts[order]
+
+    @staticmethod
+    def __count_sharded_n_grams(word_ids: np.ndarray, size: int, number: int, executor: Executor, n_workers: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Helper function that counts n-grams of each shard of the text in the executor and merges the results
+
+        Args:
+            word_ids (np.ndarray): Words as indices into the vocabulary
+            size (int): Size of the vocabulary
+            number (int): n-gram
+            executor (Executor): pool to count shards in
+            n_workers (int): number of shards
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Same as _count_n_gram_windows
+        """
+        positions = len(word_ids) - number + 1
+        bounds = np.linspace(0, positions, n_workers + 1, dtype=np.intp)
+        spans = [(int(start), int(end)) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+        # Shards overlap by number - 1 words, so n-grams crossing a boundary are counted exactly once
+        shards = [word_ids[start : end + number - 1] for start, end in spans]
+        starts = [start for start, _ in spans]
+        partials = list(executor.map(_count_n_gram_windows, shards, repeat(size), repeat(number), starts))
+
+        grams, _, inverse, _ = _unique_n_grams(np.concatenate([grams for grams, _, _ in partials]), size)
 
-        grams = []
-        len_words = len(self.text.words)
+        counts = np.zeros(len(grams), dtype=np.intp)
+        np.add.at(counts, inverse, np.concatenate([counts for _, _, counts in partials]))
 
-        for i in range(len_words - number+1):
-            gram = ' '.join(self.text.words[i : i+number])
-            grams.append(gram)
+        first_index = np.full(len(grams), positions, dtype=np.intp)
+        np.minimum.at(first_index, inverse, np.concatenate([first_index for _, first_index, _ in partials]))
 
-        return grams
+        return grams, first_index, counts
+
+    @staticmethod
+    def __count_dense_n_grams(word_ids: np.ndarray, size: int, number: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Helper function that counts n-grams in a table with a cell for every possible n-gram
+
+        Args:
+            word_ids (np.ndarray): Words as indices into the vocabulary
+            size (int): Size of the vocabulary
+            number (int): n-gram
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Same as __count_n_grams
+        """
+        shape = (size,) * number
+        cells = _pack_n_grams(sliding_window_view(word_ids, number), size)
+        positions = len(cells)
+
+        table = np.bincount(cells, minlength=size ** number)
+        first_index = np.full(size ** number, positions, dtype=np.intp)
+        np.minimum.at(first_index, cells, np.arange(positions))
+
+        cells = np.flatnonzero(table)
+        order = np.lexsort((first_index[cells], -table[cells]))
+        cells = cells[order]
+
+        return np.stack(np.unravel_index(cells, shape), axis=1), table[cells]
     
-    def calculate_n_grams(self, n_start: int = 2, n_end: int = 4) -> List[Dict]:
+    def calculate_n_grams(self, n_start: int = 2, n_end: int = 4, n_workers: int = 1) -> List[Dict]:
         """Function to calculate n-grams for the provided text
 
         Args:
             n_start (int, optional): start index. Defaults to 2.
             n_end (int, optional): end index. Defaults to 3.
+            n_workers (int, optional): number of processes to count n-grams in. Defaults to 1.
 
         Returns:
             List[Dict]: List of n-grams as dictionaries
@@ -80,13 +279,29 @@ class ZipfAnalyzer:
         if n_end > 10:
             raise Exception('End index cannot be greater than 10')
 
-        n_grams: List = []
-        
-        for n in range(n_start, n_end):
-            grams = self.__generate_n_grams(n)
-            g = dict(Counter(grams).most_common())
+        if n_workers < 1:
+            raise Exception('Number of workers cannot be lower than 1')
+
+        words = self.text.words
+
+        # n-grams counted for a given n are reused until the text gets other words, which always come encoded as a new Words
+        if words is not self.__n_grams_words:
+            self.__n_grams_words, self.__n_grams = words, {}
+
+        missing = [n for n in range(n_start, n_end) if n not in self.__n_grams]
+        vocabulary, word_ids = self.__encoded_words
+
+        # Worker processes only pay off for n-grams that are sorted, not counted in a dense table
+        sharded = any(len(word_ids) >= n and not _uses_dense_table(len(vocabulary), n, len(word_ids)) for n in missing)
 
-            n_grams.append(g)
+        with ProcessPoolExecutor(n_workers) if n_workers > 1 and sharded else nullcontext() as executor:
+            for n in missing:
+                self.__n_grams[n] = self.__count_n_grams(n, executor, n_workers)
+
+        n_grams: List = [
+            dict(zip(map(' '.join, vocabulary[grams].tolist()), counts.tolist()))
+            for grams, counts in (self.__n_grams[n] for n in range(n_start, n_end))
+        ]
 
         return n_grams
 
@@ -128,14 +343,17 @@ class ZipfPrinter:
     def print_collocations_result(self) -> None:
         print('- - - - - COLLOCATIONS ANALYSIS - - - - -\n')
 
-        unique_words = list(set(self.text.words))
-        collocations = {unique_word: [] for unique_word in unique_words}
+        words = self.text.words
+        collocations: Dict[str, Set[str]] = defaultdict(set)
+
+        for word, next_word in zip(words, words[1:]):
+            collocations[word].add(next_word)
 
-        for i in range(len(self.text.words) - 1):
-            collocations[self.text.words[i]].append(self.text.words[i+1])
+        if words:
+            collocations.setdefault(words[-1], set()) # the last word may have no collocations at all
 
         for key, value in collocations.items():
-            print(f'{key} occurs in {len(set(value))} collocations\t')
+            print(f'{key} occurs in {len(value)} collocations\t')
 
         if self.use_writer:
             writer = ZipfWriter(self.text)
@@ -147,7 +365,8 @@ class ZipfWriter:
 
     def __init__(self, text: Text) -> None:
         self.text = text
-        self.output_path = "data/output/"
+        self.output_dir = Path('data/output').resolve()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
 
     def write_n_grams_result(self, n_grams: List[Dict], start_index: int = 2) -> None:
         """Writes n-grams analysis result to a text file in data/output folder
@@ -159,22 +378,14 @@ class ZipfWriter:
             None
         """
 
-        file_name = f"{self.text.text_name.replace(' ', '_')}_n_grams_result.txt"
-        file_path = Path(self.output_path + file_name).absolute()
-
-        if not file_path.exists():
-            file_path.touch()
+        file_path = self.output_dir / f"{self.text.text_name.replace(' ', '_')}_n_grams_result.txt"
 
-        with open(file_path, 'w') as f:
+        with file_path.open('w') as f:
             f.write(f'N-grams analysis for "{self.text.text_name}" by {self.text.text_author}\n')
 
             for index, n_gram in enumerate(n_grams):
-                print(type(n_gram))
                 f.write(f'\n{index + start_index}-GRAMs\n--------\n')
-
-                for key, value in n_gram.items():
-                    if value > 1:
-                        f.write(f'{key}: {value}\n')
+                f.write(''.join(f'{key}: {value}\n' for key, value in n_gram.items() if value > 1))
 
             f.write('\n\n')
 
@@ -182,23 +393,18 @@ class ZipfWriter:
         """Writes collocations analysis result to a text file
 
         Args:
-            collocations (Dict): Dictionary of collocations
+            collocations (Dict): Dictionary of words and sets of words following them
 
         Returns:
             None
         """
 
-        file_name = f"{self.text.text_name.replace(' ', '_')}_collocations_result.txt"
-        file_path = Path(self.output_path + file_name).absolute()
-
-        if not file_path.exists():
-            file_path.touch()
+        file_path = self.output_dir / f"{self.text.text_name.replace(' ', '_')}_collocations_result.txt"
 
-        with open(file_path, 'w') as f:
+        with file_path.open('w') as f:
             f.write(f'Collocations analysis for "{self.text.text_name}" by {self.text.text_author}\n\n')
 
-            for key, value in collocations.items():
-                f.write(f'{key} occurs in {len(set(value))} collocations\n')
+            f.write(''.join(f'{key} occurs in {len(value)} collocations\n' for key, value in collocations.items()))
 
             f.write('\n\n')
 
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from models import text as text_module
+from models.text import Text, Words
+
+
+class TestWords(unittest.TestCase):
+
+    def setUp(self):
+        self.tokens = [b'ala', b'ma', b'kota', b'ala']
+        self.words = Words.from_tokens(self.tokens)
+
+    def test_behaves_like_list(self):
+        expected = ['ala', 'ma', 'kota', 'ala']
+
+        self.assertEqual(self.words, expected)
+        self.assertEqual(expected, self.words)
+        self.assertNotEqual(self.words, expected[:-1])
+        self.assertEqual(self.words[0], 'ala')
+        self.assertEqual(self.words[1:3], ['ma', 'kota'])
+        self.assertEqual(self.words + ['psa'], expected + ['psa'])
+        self.assertEqual(['psa'] + self.words, ['psa'] + expected)
+
+    def test_invalid_utf8_tokens_are_dropped(self):
+        words = Words.from_tokens([b'ok', b'\xff', b'x\xfe', b'\xff\xfe', b'ok'])
+
+        self.assertEqual(words, ['ok', 'x', 'ok'])
+        self.assertEqual(words.vocabulary.tolist(), ['ok', 'x'])
+
+    def test_from_words_matches_from_tokens(self):
+        words = Words.from_words(token.decode('utf-8') for token in self.tokens)
+
+        self.assertEqual(words, self.words)
+        self.assertEqual(words.vocabulary.tolist(), self.words.vocabulary.tolist())
+        self.assertEqual(words.ids.tolist(), self.words.ids.tolist())
+
+
+class TestTextWords(unittest.TestCase):
+
+    def test_assigned_sequence_is_encoded(self):
+        text = Text('Test text')
+        text.words = ['ala', 'ma', 'kota', 'ala']
+
+        self.assertIsInstance(text.words, Words)
+        self.assertEqual(text.words, ['ala', 'ma', 'kota', 'ala'])
+        self.assertEqual(text.words.vocabulary.tolist(), ['ala', 'ma', 'kota'])
+
+    def test_new_source_resets_words(self):
+        text = Text('Test text')
+        text.words = ['ala']
+        text.text_file_path = 'missing.txt'
+
+        with self.assertRaises(Exception):
+            text.words
+
+
+class TestTokenize(unittest.TestCase):
+
+    def words_of(self, content: bytes):
+        fd, path = tempfile.mkstemp(suffix='.txt')
+
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+
+        try:
+            return Text('Test text', text_file_path=path).get_words()
+        finally:
+            os.remove(path)
+
+    def test_comment_lines(self):
+        self.assertEqual(self.words_of(b'# start\nala ma\n#middle line\nkota\n#'), ['ala', 'ma', 'kota'])
+
+    def test_indented_hash_is_not_a_comment(self):
+        self.assertEqual(self.words_of(b'ala\n  # kota'), ['ala', '#', 'kota'])
+
+    def test_punctuation_separates_words(self):
+        self.assertEqual(self.words_of(b'ala,ma.kota-i=psa, ...'), ['ala', 'ma', 'kota', 'i', 'psa'])
+
+    def test_crlf_line_endings(self):
+        self.assertEqual(self.words_of(b'ala ma\r\n# kota\r\npsa\r\n'), ['ala', 'ma', 'psa'])
+
+    def test_tabs_separate_words(self):
+        self.assertEqual(self.words_of(b'ala\tma\t\tkota'), ['ala', 'ma', 'kota'])
+
+
+class TestIterWords(unittest.TestCase):
+
+    def setUp(self):
+        content = '# Komentarz na początku\nZażółć gęślą jaźń,\n# środek\nala ma-kota.\n  # to nie komentarz\nkoniec=bez nowej linii'
+        fd, self.path = tempfile.mkstemp(suffix='.txt')
+
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.encode('utf-8').replace(b'ala', b'ala \xff'))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_matches_get_words_across_chunk_boundaries(self):
+        expected = Text('Test text', text_file_path=self.path).get_words()
+        self.assertIn('jaźń', expected)
+        self.assertEqual(expected[-1], 'linii')
+        self.assertNotIn('', expected)
+
+        for chunk_size in (1, 2, 7):
+            with self.subTest(chunk_size=chunk_size), mock.patch.object(text_module, '_CHUNK_SIZE', chunk_size):
+                self.assertEqual(list(Text('Test text', text_file_path=self.path).iter_words()), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import unittest
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+from unittest import mock
+
+import numpy as np
+
+from models.text import Text, Words
+from processing import zipf
+from processing.zipf import ZipfAnalyzer
+
+
+def make_text(words: List[str]) -> Text:
+    """Builds a text whose words are given directly instead of read from a file or url"""
+    text = Text('Test text')
+    text.words = Words.from_tokens(word.encode('utf-8') for word in words)
+
+    return text
+
+
+def count_n_grams(words: List[str], number: int) -> Dict[str, int]:
+    """Counts n-grams the straightforward way, most common first and in order of first occurrence otherwise"""
+    n_grams = Counter(' '.join(words[i : i + number]) for i in range(len(words) - number + 1))
+
+    return dict(n_grams.most_common())
+
+
+def n_gram_items(n_grams: List[Dict[str, int]]) -> List[List]:
+    """Items of every n-gram dict, so that comparisons also check their order"""
+    return [list(n_gram.items()) for n_gram in n_grams]
+
+
+def random_words(seed: int, vocabulary_size: int, length: int) -> List[str]:
+    rng = np.random.default_rng(seed)
+
+    return [f'w{i}' for i in rng.integers(0, vocabulary_size, length)]
+
+
+class TestCalcZipfLawProperties(unittest.TestCase):
+
+    def setUp(self):
+        self.words = random_words(9, 30, 1000)
+        self.frequencies = sorted(Counter(self.words).values(), reverse=True)
+        self.analyzer = ZipfAnalyzer(make_text(self.words))
+
+    def test_matches_counter(self):
+        word_ranks, word_frequencies = self.analyzer.calc_zipf_law_properties()
+
+        self.assertEqual(word_frequencies.tolist(), self.frequencies)
+        self.assertEqual(word_ranks.tolist(), list(range(1, len(self.frequencies) + 1)))
+
+    def test_limit(self):
+        for limit in (1, 5, len(self.frequencies), len(self.frequencies) + 10):
+            with self.subTest(limit=limit):
+                word_ranks, word_frequencies = self.analyzer.calc_zipf_law_properties(limit)
+
+                self.assertEqual(word_frequencies.tolist(), self.frequencies[:limit])
+                self.assertEqual(word_ranks.tolist(), list(range(1, min(limit, len(self.frequencies)) + 1)))
+
+    def test_limit_lower_than_one(self):
+        with self.assertRaises(Exception):
+            self.analyzer.calc_zipf_law_properties(0)
+
+    def test_empty_text(self):
+        word_ranks, word_frequencies = ZipfAnalyzer(make_text([])).calc_zipf_law_properties()
+
+        self.assertEqual(word_ranks.tolist(), [])
+        self.assertEqual(word_frequencies.tolist(), [])
+
+
+class TestCalculateNGrams(unittest.TestCase):
+
+    def test_matches_counter(self):
+        words = random_words(0, 50, 3000)
+        n_grams = ZipfAnalyzer(make_text(words)).calculate_n_grams(1, 6)
+
+        for number, result in enumerate(n_grams, start=1):
+            expected = count_n_grams(words, number)
+            self.assertEqual(result, expected)
+            self.assertEqual(list(result), list(expected))
+
+    def test_text_shorter_than_n_gram(self):
+        n_grams = ZipfAnalyzer(make_text(['a', 'b'])).calculate_n_grams(2, 5)
+
+        self.assertEqual(n_grams, [{'a b': 1}, {}, {}])
+
+    def test_reused_n_grams(self):
+        words = random_words(7, 20, 500)
+        text = make_text(words)
+        analyzer = ZipfAnalyzer(text)
+
+        first = analyzer.calculate_n_grams(2, 4)
+        first[0].clear()
+        self.assertEqual(analyzer.calculate_n_grams(2, 5), [count_n_grams(words, number) for number in range(2, 5)])
+
+        text.words = Words.from_tokens([b'a', b'b', b'a', b'b'])
+        self.assertEqual(analyzer.calculate_n_grams(2, 4), [{'a b': 2, 'b a': 1}, {'a b a': 1, 'b a b': 1}])
+
+    def test_plain_list_changed_in_place(self):
+        words = ['a', 'b', 'a', 'b']
+        text = Text('Test text')
+        text.words = words
+        analyzer = ZipfAnalyzer(text)
+
+        self.assertEqual(analyzer.calculate_n_grams(2, 3), [{'a b': 2, 'b a': 1}])
+        words.append('c')
+
+        # Both methods keep analyzing the words as they were when assigned
+        self.assertEqual(analyzer.calculate_n_grams(2, 3), [{'a b': 2, 'b a': 1}])
+        self.assertEqual(analyzer.calc_zipf_law_properties()[1].tolist(), [2, 2])
+
+        text.words = words
+        self.assertEqual(analyzer.calculate_n_grams(2, 3), [{'a b': 2, 'b a': 1, 'b c': 1}])
+        self.assertEqual(analyzer.calc_zipf_law_properties()[1].tolist(), [2, 2, 1])
+
+    def test_plain_list_of_words(self):
+        words = random_words(6, 20, 500)
+        text = Text('Test text')
+        text.words = words
+
+        self.assertEqual(ZipfAnalyzer(text).calculate_n_grams(2, 4), [count_n_grams(words, number) for number in range(2, 4)])
+
+    def test_workers_match_single_process(self):
+        cases = {
+            'dense': random_words(1, 5, 400),
+            'packed': random_words(2, 50, 3000),
+            'short': random_words(3, 50, 4),
+        }
+
+        for name, words in cases.items():
+            with self.subTest(name):
+                expected = n_gram_items(ZipfAnalyzer(make_text(words)).calculate_n_grams(2, 6))
+                self.assertEqual(n_gram_items(ZipfAnalyzer(make_text(words)).calculate_n_grams(2, 6, n_workers=3)), expected)
+
+    def test_no_workers_for_dense_tables(self):
+        words = random_words(8, 5, 400)
+
+        with mock.patch.object(zipf, 'ProcessPoolExecutor') as executor:
+            ZipfAnalyzer(make_text(words)).calculate_n_grams(1, 4, n_workers=3)
+
+        executor.assert_not_called()
+
+    def test_workers_match_single_process_hashed(self):
+        words = random_words(4, 50, 3000)
+
+        # Threads share the patched limit, worker processes may not
+        with mock.patch.object(zipf, '_PACKED_GRAMS_LIMIT', 1), mock.patch.object(zipf, 'ProcessPoolExecutor', ThreadPoolExecutor):
+            expected = n_gram_items(ZipfAnalyzer(make_text(words)).calculate_n_grams(2, 6))
+            self.assertEqual(n_gram_items(ZipfAnalyzer(make_text(words)).calculate_n_grams(2, 6, n_workers=3)), expected)
+
+        self.assertEqual(expected, n_gram_items([count_n_grams(words, number) for number in range(2, 6)]))
+
+
+class TestUniqueNGrams(unittest.TestCase):
+
+    def test_hash_collisions_fall_back_to_rows(self):
+        grams = np.random.default_rng(5).integers(0, 4, (500, 3)).astype(np.int32)
+        expected = zipf._unique_n_grams(grams, 4)
+
+        # A zero multiplier hashes n-grams by their last word only, so most of them collide
+        with mock.patch.object(zipf, '_PACKED_GRAMS_LIMIT', 1), mock.patch.object(zipf, '_HASH_MULTIPLIER', np.uint64(0)):
+            result = zipf._unique_n_grams(grams, 4)
+
+        for name, expected_array, result_array in zip(('grams', 'first index', 'inverse', 'counts'), expected, result):
+            with self.subTest(name):
+                np.testing.assert_array_equal(result_array, expected_array)
+
+
+if __name__ == '__main__':
+    unittest.main()